@@ -1,12 +1,16 @@
+import bisect
 import hashlib
+import re
 import pandas as pd
 import streamlit as st
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
+from sklearn.feature_extraction.text import TfidfVectorizer
 import matplotlib.pyplot as plt
 import plotly.express as px
 import time
-from PIL import Image
+import threading
+from PIL import Image, ImageSequence
 import pytesseract
 import requests
 from bs4 import BeautifulSoup
@@ -132,6 +136,18 @@ if 'logged_in' not in st.session_state:
 if 'current_user' not in st.session_state:
     st.session_state['current_user'] = None
 
+if 'transaction_store' not in st.session_state:
+    st.session_state['transaction_store'] = {}
+
+if 'review_queue' not in st.session_state:
+    st.session_state['review_queue'] = []
+
+if 'ocr_job' not in st.session_state:
+    st.session_state['ocr_job'] = None
+
+if 'ocr_job_shown' not in st.session_state:
+    st.session_state['ocr_job_shown'] = False
+
 # Password Hashing Function
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -287,30 +303,418 @@ def process_kmeans_clustering(df):
     - **Business Insight:** Identify high-value frequent purchase items for inventory optimization
     """)
 
+# Bank Statement Transaction Store
+SALARY_KEYWORDS = ["SALARY", "SAL CR", "PAYROLL", "STIPEND"]
+SALARY_MIN_MONTHS = 3
+SALARY_MIN_AMOUNT = 10000.0
+AMOUNT_PATTERN = r"-?[\d,]+\.\d{2}"
+MARKER_PATTERN = r"Cr|Dr|CR|DR"
+# Narration whose last word is neither an amount nor a Cr/Dr marker, so it can never swallow the amount column
+NARRATION_PATTERN = rf"(?:[^\n]*?[ \t])?(?!(?:{AMOUNT_PATTERN}|{MARKER_PATTERN})(?:[ \t]|$))[^ \t\n]+"
+OPENING_BALANCE_PATTERN = rf"opening[ \t]+balance[^\n\d-]*({AMOUNT_PATTERN})(?:[ \t]*({MARKER_PATTERN}))?"
+
+def parse_amount(value):
+    return float(value.replace(",", ""))
+
+def parse_balance(value, marker):
+    # A Dr balance is overdrawn
+    balance = parse_amount(value)
+    return -abs(balance) if marker.upper() == "DR" else balance
+
+def signed_from_balance(amount, balance, previous_balance):
+    # Sign an unmarked amount from the change in running balance; None when that is not possible
+    if balance is None or previous_balance is None:
+        return None
+    change = round(balance - previous_balance, 2)
+    if abs(abs(change) - abs(amount)) > 0.01:
+        return None
+    return abs(amount) if change >= 0 else -abs(amount)
+
+def find_opening_balance(extracted_text):
+    opening = re.search(OPENING_BALANCE_PATTERN, extracted_text, re.IGNORECASE)
+    return parse_balance(opening.group(1), opening.group(2) or "") if opening else None
+
+def parse_bank_transactions(extracted_text):
+    # Date, narration, amount with an optional Cr/Dr marker and running balance (which may carry its
+    # own Cr/Dr suffix). Rows whose debit/credit direction cannot be worked out are skipped and counted.
+    pattern = (
+        rf"^[ \t]*(\d{{2}}/\d{{2}}/\d{{4}})[ \t]+({NARRATION_PATTERN})[ \t]+({AMOUNT_PATTERN})[ \t]*({MARKER_PATTERN})?"
+        rf"(?:[ \t]+({AMOUNT_PATTERN})(?:[ \t]*({MARKER_PATTERN}))?)?[ \t]*$"
+    )
+    previous_balance = find_opening_balance(extracted_text)
+
+    transactions = []
+    skipped = 0
+    for date, description, amount, marker, balance, balance_marker in re.findall(pattern, extracted_text, re.MULTILINE):
+        description = " ".join(description.upper().split())
+        balance = parse_balance(balance, balance_marker) if balance else None
+        if "OPENING BALANCE" in description or "CLOSING BALANCE" in description:
+            previous_balance = balance if balance is not None else parse_balance(amount, marker)
+            continue
+        amount = parse_amount(amount)
+
+        if marker.upper() == "DR" or amount < 0:
+            amount = -abs(amount)
+        elif marker.upper() != "CR":
+            amount = signed_from_balance(amount, balance, previous_balance)
+        if balance is not None:
+            previous_balance = balance
+        if amount is None:
+            skipped += 1
+            continue
+
+        transactions.append({"Date": date, "Description": description, "Amount": amount, "Balance": balance})
+    return transactions, skipped
+
+def parse_column_statement(extracted_text):
+    # Separate withdrawal / deposit / balance columns. OCR drops empty cells, so a row carries either
+    # all three values (blank cells printed as "-") or just one amount plus the balance.
+    pattern = (
+        rf"^[ \t]*(\d{{2}}/\d{{2}}/\d{{4}})[ \t]+({NARRATION_PATTERN})((?:[ \t]+(?:{AMOUNT_PATTERN}|-)){{2,3}})"
+        rf"(?:[ \t]*({MARKER_PATTERN}))?[ \t]*$"
+    )
+    previous_balance = find_opening_balance(extracted_text)
+
+    transactions = []
+    skipped = 0
+    for date, description, amounts, balance_marker in re.findall(pattern, extracted_text, re.MULTILINE):
+        description = " ".join(description.upper().split())
+        values = amounts.split()
+        balance = parse_balance(values[-1], balance_marker) if values[-1] != "-" else None
+        values = [parse_amount(value) if value != "-" else None for value in values[:-1]] + [balance]
+        if "OPENING BALANCE" in description or "CLOSING BALANCE" in description:
+            previous_balance = balance
+            continue
+
+        if len(values) == 3:
+            withdrawal, deposit = values[0] or 0.0, values[1] or 0.0
+            amount = deposit - withdrawal if (withdrawal == 0) != (deposit == 0) else None
+        else:
+            amount = signed_from_balance(values[0], balance, previous_balance) if values[0] is not None else None
+        if balance is not None:
+            previous_balance = balance
+        if amount is None:
+            skipped += 1
+            continue
+
+        transactions.append({"Date": date, "Description": description, "Amount": amount, "Balance": balance})
+    return transactions, skipped
+
+def get_transaction_store(customer):
+    store = st.session_state['transaction_store']
+    if customer not in store:
+        store[customer] = {
+            "hash_counts": {},
+            "transactions": [],
+            "monthly": {},
+            "salary_months": set(),
+            "balance_sum": 0.0,
+            "balance_count": 0
+        }
+    return store[customer]
+
+def transaction_hash(txn):
+    key = f"{txn['Date']}|{txn['Amount']:.2f}|{txn['Description']}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def add_transactions(customer, transactions):
+    # Overlapping statements repeat rows we already hold, but a single statement can also contain
+    # genuine repeats (two identical ATM withdrawals), so only skip as many copies as are stored
+    store = get_transaction_store(customer)
+    seen = {}
+    added = 0
+    for txn in transactions:
+        txn_hash = transaction_hash(txn)
+        seen[txn_hash] = seen.get(txn_hash, 0) + 1
+        if seen[txn_hash] <= store["hash_counts"].get(txn_hash, 0):
+            continue
+        store["hash_counts"][txn_hash] = seen[txn_hash]
+        store["transactions"].append(txn)
+        added += 1
+
+        _, month, year = txn["Date"].split("/")
+        month_key = f"{year}-{month}"
+        monthly = store["monthly"].setdefault(month_key, {"Inflow": 0.0, "Outflow": 0.0})
+        if txn["Amount"] >= 0:
+            monthly["Inflow"] += txn["Amount"]
+            if txn["Amount"] >= SALARY_MIN_AMOUNT and any(keyword in txn["Description"] for keyword in SALARY_KEYWORDS):
+                store["salary_months"].add(month_key)
+        else:
+            monthly["Outflow"] += -txn["Amount"]
+
+        # Average balance only uses balances printed on the statement
+        if txn["Balance"] is not None:
+            store["balance_sum"] += txn["Balance"]
+            store["balance_count"] += 1
+    return added
+
+def get_customer_features(customer):
+    store = st.session_state['transaction_store'].get(customer)
+    if not store or not store["transactions"]:
+        return None
+
+    months = len(store["monthly"])
+    total_inflow = sum(m["Inflow"] for m in store["monthly"].values())
+    total_outflow = sum(m["Outflow"] for m in store["monthly"].values())
+    return {
+        "Months": months,
+        "Avg Monthly Inflow": total_inflow / months,
+        "Avg Monthly Outflow": total_outflow / months,
+        "Average Balance": store["balance_sum"] / store["balance_count"] if store["balance_count"] else None,
+        "Salary Detected": len(store["salary_months"]) >= SALARY_MIN_MONTHS
+    }
+
+# Document Layout Index
+# Sample OCR text for each known (document type, issuer template) layout
+LAYOUT_SAMPLES = {
+    ("Bank Statements", "Generic Bank"): "account statement statement period opening balance closing balance date description debit credit balance cr dr",
+    ("Bank Statements", "State Bank of India"): "state bank of india sbi account statement branch ifsc txn date value date description ref no cheque no debit credit balance",
+    ("Bank Statements", "HDFC Bank"): "hdfc bank statement of account narration chq ref no value dt withdrawal amt deposit amt closing balance",
+    ("Payslips", "Generic Payslip"): "payslip salary slip pay period employee name employee id designation basic salary hra allowances deductions provident fund professional tax net pay",
+    ("Invoices", "Generic Invoice"): "invoice invoice no invoice date bill to ship to item description quantity unit price amount subtotal tax gst total due",
+    ("Invoices", "Car Rental"): "car rental invoice hourly car rental weekly car rent monthly car rental pickup return vehicle rate amount total",
+    ("Cash Flow", "Generic Cash Flow"): "cash flow statement operating activities investing activities financing activities net cash inflow outflow cash and cash equivalents",
+    ("Profit and Loss", "Generic P&L"): "profit and loss statement income statement revenue sales cost of goods sold cogs gross profit operating expenses ebitda net profit",
+}
+LAYOUT_MATCH_THRESHOLD = 0.2
+# Layout cues live in the header; classifying only a bounded prefix keeps latency flat and stops
+# long transaction bodies from diluting the score
+LAYOUT_HEADER_LINES = 12
+LAYOUT_HEADER_CHARS = 800
+BANK_STATEMENT_PARSERS = {
+    "State Bank of India": parse_column_statement,
+    "HDFC Bank": parse_column_statement,
+}
+
+@st.cache_resource
+def build_layout_index():
+    # Documents are scored with the fitted analyzer and idf weights directly: TfidfVectorizer.transform
+    # spends most of a millisecond per call on input validation and sparse bookkeeping
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+    matrix = vectorizer.fit_transform(LAYOUT_SAMPLES.values())
+    return {
+        "analyzer": vectorizer.build_analyzer(),
+        "vocabulary": vectorizer.vocabulary_,
+        "idf": vectorizer.idf_,
+        "matrix": matrix.toarray(),
+        "layouts": list(LAYOUT_SAMPLES.keys())
+    }
+
+def get_statement_parser(template):
+    return BANK_STATEMENT_PARSERS.get(template, parse_bank_transactions)
+
+def uploaded_file_key(uploaded_file):
+    return f"{uploaded_file.name}-{uploaded_file.size}"
+
+def document_header(extracted_text):
+    # Scan lazily so long documents cost no more than short ones
+    lines = []
+    for match in re.finditer(r"[^\n]*\S[^\n]*", extracted_text):
+        lines.append(match.group())
+        if len(lines) == LAYOUT_HEADER_LINES:
+            break
+    return "\n".join(lines)[:LAYOUT_HEADER_CHARS]
+
+def classify_document(extracted_text):
+    index = build_layout_index()
+    counts = {}
+    for term in index["analyzer"](document_header(extracted_text)):
+        column = index["vocabulary"].get(term)
+        if column is not None:
+            counts[column] = counts.get(column, 0) + 1
+    if not counts:
+        return None, None, 0.0
+
+    # Sublinear tf-idf of the header; layout rows are L2-normalised, so this is the cosine similarity
+    columns = np.fromiter(counts.keys(), dtype=int, count=len(counts))
+    weights = (1 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts)))) * index["idf"][columns]
+    scores = index["matrix"][:, columns] @ weights / np.linalg.norm(weights)
+    best = int(scores.argmax())
+    if scores[best] < LAYOUT_MATCH_THRESHOLD:
+        return None, None, float(scores[best])
+    doc_type, template = index["layouts"][best]
+    return doc_type, template, float(scores[best])
+
+# Streaming OCR
+BLOCKS_PER_PAGE = 4
+
+def split_into_blocks(page, blocks=BLOCKS_PER_PAGE):
+    # Cut at the blankest pixel row near each boundary so text lines are not sliced in half
+    gray = np.asarray(page.convert("L"))
+    ink = (gray < 128).sum(axis=1)
+    height = gray.shape[0]
+    window = max(height // (blocks * 4), 1)
+    cuts = [0]
+    for i in range(1, blocks):
+        target = height * i // blocks
+        low, high = max(target - window, cuts[-1] + 1), min(target + window, height - 1)
+        if low < high:
+            cuts.append(low + int(ink[low:high].argmin()))
+    cuts.append(height)
+    return [page.crop((0, top, page.width, bottom)) for top, bottom in zip(cuts, cuts[1:])]
+
+def run_ocr_job(job, pages):
+    # Runs in a worker thread: no Streamlit calls here, results are handed back through the job dict
+    try:
+        for page_number, page in enumerate(pages, start=1):
+            for block in split_into_blocks(page):
+                if job["cancel"].is_set():
+                    return
+                text = pytesseract.image_to_string(block)
+                if job["cancel"].is_set():
+                    return
+                if job["first_result"] is None:
+                    job["first_result"] = time.perf_counter() - job["start"]
+                job["blocks"].append({"Page": page_number, "Text": text})
+    except Exception as e:
+        job["error"] = str(e)
+    finally:
+        job["done"] = True
+
+def start_ocr_job(file_key, img):
+    pages = [page.convert("RGB") for page in ImageSequence.Iterator(img)]
+    job = {
+        "file": file_key,
+        "pages": len(pages),
+        "blocks": [],
+        "cancel": threading.Event(),
+        "start": time.perf_counter(),
+        "first_result": None,
+        "done": False,
+        "error": None
+    }
+    threading.Thread(target=run_ocr_job, args=(job, pages), daemon=True).start()
+    st.session_state['ocr_job'] = job
+    return job
+
+def stop_unshown_ocr_job():
+    # Called at the end of every run: a job whose file was not streamed on this run (streaming
+    # turned off, file removed, page left) has no one watching it, so stop the worker
+    job = st.session_state['ocr_job']
+    if job is not None and not st.session_state['ocr_job_shown']:
+        job["cancel"].set()
+        st.session_state['ocr_job'] = None
+
+def stream_ocr(file_type, uploaded_file, img):
+    # Reuse the running job across reruns (e.g. the Cancel click) instead of restarting OCR
+    st.session_state['ocr_job_shown'] = True
+    file_key = uploaded_file_key(uploaded_file)
+    job = st.session_state['ocr_job']
+    if job is None or job["file"] != file_key:
+        if job is not None:
+            job["cancel"].set()
+        job = start_ocr_job(file_key, img)
+    elif job["cancel"].is_set() and st.button("🔄 Restart OCR"):
+        job = start_ocr_job(file_key, img)
+
+    if not job["done"] and not job["cancel"].is_set() and st.button("⏹ Cancel OCR"):
+        job["cancel"].set()
+
+    status = st.empty()
+    metric = st.empty()
+    text_placeholder = st.empty()
+    rows_placeholder = st.empty()
+    chart_placeholder = st.empty()
+
+    shown_blocks = -1
+    shown_rows = 0
+    while True:
+        # A cancelled job is not waited on: the worker drops the block it is still reading
+        done = job["done"] or job["cancel"].is_set()
+        blocks = list(job["blocks"])
+        page = blocks[-1]["Page"] if blocks else 1
+        # Touch a placeholder on every poll so Streamlit can act on a Cancel click right away
+        status.write(f"🔍 Page {page} of {job['pages']}: {len(blocks)} blocks extracted ({time.perf_counter() - job['start']:.1f} s)")
+        if len(blocks) != shown_blocks:
+            shown_blocks = len(blocks)
+            text = "\n".join(block["Text"] for block in blocks)
+            if job["first_result"] is not None:
+                metric.metric("Time to First Result", f"{job['first_result'] * 1000:.0f} ms")
+            if text.strip():
+                text_placeholder.code(text, language="text")
+
+                partial_type, partial_template = file_type, None
+                if partial_type == "Auto Detect":
+                    partial_type, partial_template, _ = classify_document(text)
+                if partial_type == "Bank Statements":
+                    rows, _ = get_statement_parser(partial_template)(text)
+                    if len(rows) != shown_rows:
+                        shown_rows = len(rows)
+                        df = pd.DataFrame(rows)
+                        rows_placeholder.dataframe(df, use_container_width=True)
+                        fig_bar = px.bar(df, x="Date", y="Amount", title="Transactions Extracted So Far", color_discrete_sequence=px.colors.qualitative.Dark24)
+                        chart_placeholder.plotly_chart(fig_bar)
+        if done:
+            break
+        time.sleep(0.1)
+
+    # The final analysis below renders the full results, so drop the partial views
+    status.empty()
+    text_placeholder.empty()
+    rows_placeholder.empty()
+    chart_placeholder.empty()
+
+    blocks = list(job["blocks"])
+    if job["error"]:
+        st.error(f"Error during OCR: {job['error']}")
+    elif job["cancel"].is_set():
+        st.warning(f"OCR cancelled. Showing partial results from {len(blocks)} blocks.")
+    return "\n".join(block["Text"] for block in blocks)
+
 def process_structured_data():
     st.header("📑 Structured Data Analysis")
-    file_type = st.selectbox("Select Data Type", ["Cash Flow", "Payslips", "Bank Statements", "Profit and Loss", "Invoices"])
+    file_type = st.selectbox("Select Data Type", ["Auto Detect", "Cash Flow", "Payslips", "Bank Statements", "Profit and Loss", "Invoices"])
+    streaming = st.checkbox("⚡ Stream OCR results progressively", value=True)
 
-    uploaded_file = st.file_uploader("Upload Structured Document", type=["jpg", "png"])
+    uploaded_file = st.file_uploader("Upload Structured Document", type=["jpg", "png", "tif", "tiff"])
     if uploaded_file:
         try:
             img = Image.open(uploaded_file)
             st.image(img, caption="Uploaded Document", use_container_width=True)
 
-            with st.spinner("🔍 Extracting Text..."):
-                extracted_text = pytesseract.image_to_string(img)
-                time.sleep(1)
+            if streaming:
+                extracted_text = stream_ocr(file_type, uploaded_file, img)
+            else:
+                with st.spinner("🔍 Extracting Text..."):
+                    extracted_text = "\n".join(pytesseract.image_to_string(page) for page in ImageSequence.Iterator(img))
 
             if extracted_text.strip():
                 with st.expander("📄 View Extracted Text"):
                     st.code(extracted_text, language="text")
-                process_structured_analysis(file_type, extracted_text)
+
+                template = None
+                if file_type == "Auto Detect":
+                    file_type, template, score = classify_document(extracted_text)
+                    if file_type is None:
+                        file_key = uploaded_file_key(uploaded_file)
+                        if all(item["Key"] != file_key for item in st.session_state['review_queue']):
+                            st.session_state['review_queue'].append({"Key": file_key, "File": uploaded_file.name, "Score": score, "Text": extracted_text})
+                        st.warning(f"Unknown document layout (best match {score:.2f}). Flagged for manual review.")
+                    else:
+                        st.info(f"Detected {file_type} ({template} template, match {score:.2f})")
+
+                if file_type is not None:
+                    process_structured_analysis(file_type, extracted_text, template)
             else:
                 st.warning("No text found in the document")
         except Exception as e:
             st.error(f"Error: {str(e)}")
 
-def process_structured_analysis(file_type, extracted_text):
+    show_review_queue()
+
+def show_review_queue():
+    queue = st.session_state['review_queue']
+    if not queue:
+        return
+    with st.expander(f"🗂 Documents Flagged for Review ({len(queue)})"):
+        for item in queue:
+            st.write(f"**{item['File']}** (best layout match {item['Score']:.2f})")
+            st.code(item["Text"], language="text")
+        if st.button("Clear Review Queue"):
+            st.session_state['review_queue'] = []
+            st.rerun()
+
+def process_structured_analysis(file_type, extracted_text, template=None):
     st.subheader("Structured Data Analysis Example")
     st.write(f"Processing {file_type} data...")
 
@@ -328,13 +732,36 @@ def process_structured_analysis(file_type, extracted_text):
    
 
     elif file_type == "Bank Statements":
+        customer = st.session_state['current_user']
+        transactions, skipped = get_statement_parser(template)(extracted_text)
+        if skipped:
+            st.warning(f"Skipped {skipped} rows whose debit/credit direction could not be determined")
+        if transactions:
+            added = add_transactions(customer, transactions)
+            st.write(f"Added {added} new transactions ({len(transactions) - added} already on record)")
+
+            store = get_transaction_store(customer)
+            monthly_df = pd.DataFrame.from_dict(store["monthly"], orient="index").sort_index()
+            monthly_df.index.name = "Month"
+            monthly_df = monthly_df.reset_index()
+            st.write("### Stored Transactions:")
+            st.write(pd.DataFrame(store["transactions"]))
+
+            fig_bar = px.bar(monthly_df, x='Month', y=['Inflow', 'Outflow'], title="Monthly Inflow vs Outflow", color_discrete_sequence=px.colors.qualitative.Dark24)
+            st.plotly_chart(fig_bar)
+
+            features = get_customer_features(customer)
+            st.write("### Statement Features:")
+            st.write(features)
+            return
+
         data = {
             "Date": ["01/01", "02/01", "03/01", "04/01"],
             "Debit": [200, 300, 250, 350],
             "Credit": [1000, 1200, 1100, 1300]
         }
         df = pd.DataFrame(data)
-       
+
         fig_bar = px.bar(df, x='Date', y=['Debit', 'Credit'], title="Bank Statement Overview", color_discrete_sequence=px.colors.qualitative.Dark24)
         st.plotly_chart(fig_bar)
         
@@ -591,17 +1018,170 @@ def process_semi_structured_data():
             st.warning("Please select at least one company to view trends.")
 
 
+# Bank interest rate data
+BANK_RATES = [
+    {"Bank Name": "State Bank of India", "Min Credit Score": 650, "Max Loan Amount": 1500000, "Base Rate": 8.5},
+    {"Bank Name": "HDFC Bank", "Min Credit Score": 700, "Max Loan Amount": 2000000, "Base Rate": 9.0},
+    {"Bank Name": "ICICI Bank", "Min Credit Score": 680, "Max Loan Amount": 1750000, "Base Rate": 8.75},
+    {"Bank Name": "Axis Bank", "Min Credit Score": 670, "Max Loan Amount": 1600000, "Base Rate": 9.25},
+]
+CASTE_CATEGORIES = ["General", "OBC", "SC", "ST", "Other"]
+CASTE_RATE_DISCOUNT = {"SC": 1.5, "ST": 1.5, "OBC": 0.75}
+MIN_INTEREST_RATE = 7.5
+
+# Bank Offer Index
+# Cached per rate table: callers fetch the index once and pass it to find_eligible_banks,
+# since each call through st.cache_resource hashes the whole rate table again
+@st.cache_resource
+def build_offer_index(bank_rates):
+    # Credit-score bands and loan-amount brackets are bounded by the lenders' own thresholds,
+    # so every applicant in the same (band, caste, bracket) cell sees the same offers
+    score_bands = sorted({bank["Min Credit Score"] for bank in bank_rates})
+    amount_brackets = sorted({bank["Max Loan Amount"] for bank in bank_rates})
+
+    offers = {}
+    for caste in CASTE_CATEGORIES:
+        discount = CASTE_RATE_DISCOUNT.get(caste, 0.0)
+        for band, min_score in enumerate(score_bands):
+            for bracket, max_amount in enumerate(amount_brackets):
+                cell = [
+                    {
+                        "Bank Name": bank["Bank Name"],
+                        "Interest Rate (%)": max(bank["Base Rate"] - discount, MIN_INTEREST_RATE),
+                        "Max Loan Amount (₹)": bank["Max Loan Amount"]
+                    }
+                    for bank in bank_rates
+                    if bank["Min Credit Score"] <= min_score and bank["Max Loan Amount"] >= max_amount
+                ]
+                offers[(band, caste, bracket)] = sorted(cell, key=lambda offer: offer["Interest Rate (%)"])
+
+    # Best rate per (caste, band, bracket) cell as an array, NaN where no bank qualifies, for batch lookups
+    best_rates = np.full((len(CASTE_CATEGORIES), len(score_bands), len(amount_brackets)), np.nan)
+    for (band, caste, bracket), cell in offers.items():
+        if cell:
+            best_rates[CASTE_CATEGORIES.index(caste), band, bracket] = cell[0]["Interest Rate (%)"]
+    return {"score_bands": score_bands, "amount_brackets": amount_brackets, "offers": offers, "best_rates": best_rates}
+
+def find_eligible_banks(index, credit_score, caste, total_loan):
+    band = bisect.bisect_right(index["score_bands"], credit_score) - 1
+    bracket = bisect.bisect_left(index["amount_brackets"], total_loan)
+    if band < 0 or bracket == len(index["amount_brackets"]):
+        return []
+    # Every caste category is indexed, so an unknown one is a bug rather than "no offers"
+    return index["offers"][(band, caste, bracket)]
+
+# EMI / Amortization Engine
+TENURE_OPTIONS = [36, 60, 84, 120, 180]  # months
+MORATORIUM_OPTIONS = [0, 6, 12, 24]  # months
+RATE_SHIFTS = [-1.0, -0.5, 0.0, 0.5, 1.0, 2.0]  # percentage points around the offered rate
+
+def compute_emi(principal, annual_rate, tenure_months, moratorium_months):
+    # All arguments broadcast against each other, so a whole scenario grid is one array expression.
+    # Interest accrued during the moratorium is capitalised monthly before repayment starts.
+    principal = np.asarray(principal, dtype=float)
+    monthly_rate = np.asarray(annual_rate, dtype=float) / 1200
+    tenure_months = np.asarray(tenure_months, dtype=float)
+    moratorium_months = np.asarray(moratorium_months, dtype=float)
+
+    outstanding = principal * (1 + monthly_rate) ** moratorium_months
+    growth = (1 + monthly_rate) ** tenure_months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        emi = np.where(monthly_rate > 0, outstanding * monthly_rate * growth / (growth - 1), outstanding / tenure_months)
+    total_interest = emi * tenure_months - principal
+    return emi, total_interest
+
+def emi_scenario_grid(principal, base_rate):
+    rates = base_rate + np.array(RATE_SHIFTS)
+    tenures = np.array(TENURE_OPTIONS)
+    moratoriums = np.array(MORATORIUM_OPTIONS)
+    emi, total_interest = compute_emi(principal, rates[:, None, None], tenures[None, :, None], moratoriums[None, None, :])
+
+    rate_grid, tenure_grid, moratorium_grid = np.meshgrid(rates, tenures, moratoriums, indexing="ij")
+    return pd.DataFrame({
+        "Interest Rate (%)": rate_grid.ravel(),
+        "Tenure (months)": tenure_grid.ravel(),
+        "Moratorium (months)": moratorium_grid.ravel(),
+        "EMI (₹)": emi.ravel(),
+        "Total Interest (₹)": total_interest.ravel()
+    })
+
+def amortization_schedule(principal, annual_rate, tenure_months, moratorium_months=0):
+    monthly_rate = annual_rate / 1200
+    emi, _ = compute_emi(principal, annual_rate, tenure_months, moratorium_months)
+
+    # Moratorium months: no payment, interest capitalised into the balance
+    moratorium = np.arange(1, moratorium_months + 1)
+    moratorium_balance = principal * (1 + monthly_rate) ** moratorium
+    moratorium_interest = np.diff(np.concatenate(([principal], moratorium_balance)))
+    outstanding = principal * (1 + monthly_rate) ** moratorium_months
+
+    # Repayment months: closed-form balance after k payments
+    k = np.arange(1, tenure_months + 1)
+    growth = (1 + monthly_rate) ** k
+    if monthly_rate > 0:
+        balance = outstanding * growth - emi * (growth - 1) / monthly_rate
+    else:
+        balance = outstanding - emi * k
+    opening = np.concatenate(([outstanding], balance[:-1]))
+    interest = opening * monthly_rate
+
+    return pd.DataFrame({
+        "Month": np.concatenate((moratorium, moratorium_months + k)),
+        "Payment (₹)": np.concatenate((np.zeros(moratorium_months), np.full(tenure_months, float(emi)))),
+        "Interest (₹)": np.concatenate((moratorium_interest, interest)),
+        "Principal (₹)": np.concatenate((np.zeros(moratorium_months), emi - interest)),
+        "Balance (₹)": np.concatenate((moratorium_balance, np.maximum(balance, 0.0)))
+    })
+
+def lookup_best_rates(index, credit_scores, castes, loan_amounts):
+    # Vectorised find_eligible_banks: best rate per applicant, NaN where no bank qualifies
+    codes = pd.Categorical(castes, categories=CASTE_CATEGORIES).codes
+    if (codes < 0).any():
+        raise KeyError(f"Unknown caste categories: {sorted(set(np.asarray(castes)[codes < 0]))}")
+    band = np.searchsorted(index["score_bands"], credit_scores, side="right") - 1
+    bracket = np.searchsorted(index["amount_brackets"], loan_amounts, side="left")
+    in_index = (band >= 0) & (bracket < len(index["amount_brackets"]))
+
+    best_rates = np.full(len(band), np.nan)
+    best_rates[in_index] = index["best_rates"][codes[in_index], band[in_index], bracket[in_index]]
+    return best_rates
+
+def batch_emi_scenarios(path="data/dataset.csv"):
+    # Every applicant row x rate shift x tenure x moratorium in a single broadcast.
+    # Returns the scenarios and the number of applicants left out because no bank made them an offer.
+    df = pd.read_csv(path)
+    df["Loan Amount"] = df[["Tuition Fee", "Exam Fee", "Hostel Fee", "Travel Fee"]].fillna(0).sum(axis=1)
+    df["Best Rate (%)"] = lookup_best_rates(
+        build_offer_index(BANK_RATES), df["Credit Score"].to_numpy(), df["Caste"], df["Loan Amount"].to_numpy())
+    no_offer = int(df["Best Rate (%)"].isna().sum())
+    df = df.dropna(subset=["Best Rate (%)"]).reset_index(drop=True)
+
+    rates = df["Best Rate (%)"].to_numpy()[:, None] + np.array(RATE_SHIFTS)[None, :]
+    tenures = np.array(TENURE_OPTIONS)
+    moratoriums = np.array(MORATORIUM_OPTIONS)
+    emi, total_interest = compute_emi(
+        df["Loan Amount"].to_numpy()[:, None, None, None],
+        rates[:, :, None, None],
+        tenures[None, None, :, None],
+        moratoriums[None, None, None, :]
+    )
+
+    shape = emi.shape
+    row_idx, shift_idx, tenure_idx, moratorium_idx = np.indices(shape).reshape(4, -1)
+    scenarios = pd.DataFrame({
+        "Full Name": df["Full Name"].to_numpy()[row_idx],
+        "Loan Amount (₹)": df["Loan Amount"].to_numpy()[row_idx],
+        "Interest Rate (%)": rates[row_idx, shift_idx],
+        "Tenure (months)": tenures[tenure_idx],
+        "Moratorium (months)": moratoriums[moratorium_idx],
+        "EMI (₹)": emi.ravel(),
+        "Total Interest (₹)": total_interest.ravel()
+    })
+    return scenarios, no_offer
+
 # Enhanced Loan Eligibility Checker
 def loan_checker():
     st.header("🎓 Education Loan Eligibility Checker")
-    
-    # Bank interest rate data
-    bank_rates = [
-        {"Bank Name": "State Bank of India", "Min Credit Score": 650, "Max Loan Amount": 1500000, "Base Rate": 8.5},
-        {"Bank Name": "HDFC Bank", "Min Credit Score": 700, "Max Loan Amount": 2000000, "Base Rate": 9.0},
-        {"Bank Name": "ICICI Bank", "Min Credit Score": 680, "Max Loan Amount": 1750000, "Base Rate": 8.75},
-        {"Bank Name": "Axis Bank", "Min Credit Score": 670, "Max Loan Amount": 1600000, "Base Rate": 9.25},
-    ]
 
     with st.form("loan_form"):
         # Personal Information
@@ -614,7 +1194,7 @@ def loan_checker():
         with col2:
             state = st.text_input("State")
             religion = st.selectbox("Religion", ["Hindu", "Muslim", "Christian", "Sikh", "Other"])
-            caste = st.selectbox("Caste Category", ["General", "OBC", "SC", "ST", "Other"])
+            caste = st.selectbox("Caste Category", CASTE_CATEGORIES)
         
         family_income = st.number_input("Family Income (₹)", min_value=0, step=1000)
 
@@ -659,6 +1239,14 @@ def loan_checker():
         branch_name = st.text_input("Branch Name")
         credit_score = st.number_input("Credit Score", min_value=300, max_value=900)
 
+        # Repayment Preferences
+        st.subheader("Repayment Preferences")
+        col1, col2 = st.columns(2)
+        with col1:
+            tenure = st.selectbox("Tenure (months)", TENURE_OPTIONS, index=1)
+        with col2:
+            moratorium = st.selectbox("Moratorium (months)", MORATORIUM_OPTIONS)
+
         if st.form_submit_button("Check Eligibility"):
             eligibility = True
             reasons = []
@@ -678,48 +1266,75 @@ def loan_checker():
             if "Engineering" in course_type and tuition_fee > 1000000:
                 eligibility = False
                 reasons.append("Engineering course fee exceeds limits")
-                
+
+            # Use precomputed bank statement features when the applicant has uploaded statements
+            features = get_customer_features(st.session_state['current_user'])
+            if features:
+                if features["Avg Monthly Outflow"] > features["Avg Monthly Inflow"]:
+                    eligibility = False
+                    reasons.append("Bank statements show outflow exceeding inflow")
+                if features["Average Balance"] is not None and features["Average Balance"] < 0:
+                    eligibility = False
+                    reasons.append("Negative average bank balance")
+                if features["Salary Detected"]:
+                    st.info("Regular salary credits detected in bank statements")
+
             if eligibility:
                 st.success("🎉 Congratulations! You're eligible for education loan!")
                 
                 # Calculate total loan requirement
                 total_loan = tuition_fee + exam_fee + (hostel_fee if living_type == "Hosteller" else travel_fee)
                 
-                # Find eligible banks
-                eligible_banks = []
-                for bank in bank_rates:
-                    if credit_score >= bank["Min Credit Score"] and total_loan <= bank["Max Loan Amount"]:
-                        # Calculate final interest rate with caste benefits
-                        final_rate = bank["Base Rate"]
-                        if caste in ["SC", "ST"]:
-                            final_rate -= 1.5
-                        elif caste == "OBC":
-                            final_rate -= 0.75
-                        final_rate = max(final_rate, 7.5)  # Minimum rate
-                        
-                        eligible_banks.append({
-                            "Bank Name": bank["Bank Name"],
-                            "Interest Rate": f"{final_rate}%",
-                            "Max Loan Amount": f"₹{bank['Max Loan Amount']:,}"
-                        })
+                # Find eligible banks, already sorted by effective rate
+                eligible_banks = find_eligible_banks(build_offer_index(BANK_RATES), credit_score, caste, total_loan)
 
                 # Display eligible banks
                 st.subheader("Available Loan Options")
                 if eligible_banks:
                     df = pd.DataFrame(eligible_banks)
-                    st.dataframe(df.style.highlight_max(subset=['Interest Rate'], color='lightgreen'), 
-                                 use_container_width=True)
+                    styled = df.style.highlight_min(subset=['Interest Rate (%)'], color='lightgreen').format(
+                        {"Interest Rate (%)": "{:.2f}%", "Max Loan Amount (₹)": "₹{:,}"})
+                    st.dataframe(styled, use_container_width=True)
+
+                    # Repayment scenarios for the best offer
+                    best_offer = eligible_banks[0]
+                    st.subheader(f"Repayment Scenarios ({best_offer['Bank Name']})")
+                    scenarios = emi_scenario_grid(total_loan, best_offer["Interest Rate (%)"])
+                    emi_table = scenarios[scenarios["Interest Rate (%)"] == best_offer["Interest Rate (%)"]].pivot(
+                        index="Tenure (months)", columns="Moratorium (months)", values="EMI (₹)")
+                    st.write("Monthly EMI (₹) by tenure and moratorium:")
+                    st.dataframe(emi_table.style.format("₹{:,.0f}"), use_container_width=True)
+
+                    fig_line = px.line(scenarios[scenarios["Moratorium (months)"] == 0], x="Tenure (months)", y="EMI (₹)",
+                                       color="Interest Rate (%)", title="EMI vs Tenure for Rate Changes", markers=True,
+                                       color_discrete_sequence=px.colors.qualitative.Dark24)
+                    st.plotly_chart(fig_line)
+
+                    with st.expander(f"📅 View Amortization Schedule ({tenure} months, {moratorium} months moratorium)"):
+                        schedule = amortization_schedule(total_loan, best_offer["Interest Rate (%)"], tenure, moratorium)
+                        st.dataframe(schedule.style.format("{:,.2f}", subset=schedule.columns[1:]), use_container_width=True)
                 else:
                     st.warning("No banks found matching your criteria")
-                
+
             else:
                 st.error(f"⚠️ Eligibility not met. Reasons: {', '.join(reasons)}")
                 st.markdown("💡 **Suggestions:** Improve credit score, explore scholarship options, or consider alternative funding sources.")
 
+    # Batch repayment scenarios for every applicant in the dataset
+    if st.button("Run Batch EMI Scenarios (data/dataset.csv)"):
+        start = time.perf_counter()
+        batch, no_offer = batch_emi_scenarios()
+        elapsed = time.perf_counter() - start
+        st.success(f"Computed {len(batch):,} scenarios in {elapsed * 1000:.0f} ms")
+        if no_offer:
+            st.warning(f"{no_offer} applicants had no eligible bank offer and are not included")
+        st.dataframe(batch, use_container_width=True)
+
 # Main Function
 def main():
     if 'current_page' not in st.session_state:
         st.session_state['current_page'] = "login"
+    st.session_state['ocr_job_shown'] = False
 
     if not st.session_state['logged_in']:
         if st.session_state['current_page'] == "login":
@@ -749,5 +1364,7 @@ def main():
         elif selection == "Education Loan Eligibility":
             loan_checker()
 
+    stop_unshown_ocr_job()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import pytest
+import streamlit as st
+
+import appfin
+
+
+@pytest.fixture(autouse=True)
+def empty_store():
+    st.session_state['transaction_store'] = {}
+
+
+def test_parses_narrations_with_punctuation():
+    text = "\n".join([
+        "05/01/2024 UPI/123/SWIGGY 250.00 Dr",
+        "06/01/2024 NEFT-RENT 15,000.00 Dr",
+        "07/01/2024 POS 4321 AMAZON.IN 999.00 Dr",
+        "08/01/2024 IMPS/P2A/ACME SALARY 50,000.00 Cr",
+    ])
+    transactions, skipped = appfin.parse_bank_transactions(text)
+    assert skipped == 0
+    assert [t["Description"] for t in transactions] == ["UPI/123/SWIGGY", "NEFT-RENT", "POS 4321 AMAZON.IN", "IMPS/P2A/ACME SALARY"]
+    assert [t["Amount"] for t in transactions] == [-250.0, -15000.0, -999.0, 50000.0]
+
+
+def test_does_not_join_lines():
+    transactions, _ = appfin.parse_bank_transactions("05/01/2024 Opening\nbalance 100.00")
+    assert transactions == []
+
+
+def test_unmarked_amount_signed_from_balance():
+    text = "\n".join([
+        "Opening Balance 10,000.00",
+        "01/02/2024 ATM 5000.00 5000.00",
+        "03/02/2024 REFUND 200.00 5200.00",
+    ])
+    transactions, skipped = appfin.parse_bank_transactions(text)
+    assert skipped == 0
+    assert [t["Amount"] for t in transactions] == [-5000.0, 200.0]
+
+
+def test_unmarked_amount_without_previous_balance_is_skipped():
+    transactions, skipped = appfin.parse_bank_transactions("01/02/2024 ATM 5000.00 10000.00")
+    assert transactions == []
+    assert skipped == 1
+
+
+def test_cr_suffixed_balance_layout():
+    text = "\n".join([
+        "Opening Balance 1,000.00 Cr",
+        "01/02/2024 NEFT-ACME 500.00 1,500.00 Cr",
+        "02/02/2024 ATM 200.00 1,300.00 Cr",
+    ])
+    transactions, skipped = appfin.parse_bank_transactions(text)
+    assert skipped == 0
+    assert [t["Description"] for t in transactions] == ["NEFT-ACME", "ATM"]
+    assert [t["Amount"] for t in transactions] == [500.0, -200.0]
+    assert [t["Balance"] for t in transactions] == [1500.0, 1300.0]
+
+
+def test_marked_amount_with_cr_suffixed_balance():
+    transactions, skipped = appfin.parse_bank_transactions("01/02/2024 UPI/ABC 500.00 Dr 1,500.00 Cr")
+    assert skipped == 0
+    assert transactions == [{"Date": "01/02/2024", "Description": "UPI/ABC", "Amount": -500.0, "Balance": 1500.0}]
+
+
+def test_dr_balance_is_overdrawn():
+    transactions, _ = appfin.parse_bank_transactions("Opening Balance 100.00 Cr\n01/02/2024 ATM 300.00 200.00 Dr")
+    assert [(t["Amount"], t["Balance"]) for t in transactions] == [(-300.0, -200.0)]
+
+
+def test_unmarked_amount_before_cr_balance_without_history_is_skipped():
+    transactions, skipped = appfin.parse_bank_transactions("01/02/2024 ATM 200.00 1,300.00 Cr")
+    assert transactions == []
+    assert skipped == 1
+
+
+def test_repeats_within_statement_are_kept_and_overlap_is_skipped():
+    atm = {"Date": "05/01/2024", "Description": "ATM", "Amount": -500.0, "Balance": None}
+    assert appfin.add_transactions("u", [atm, dict(atm)]) == 2
+    assert appfin.add_transactions("u", [dict(atm), dict(atm)]) == 0
+    assert appfin.add_transactions("u", [dict(atm), dict(atm), dict(atm)]) == 1
+    assert appfin.get_customer_features("u")["Avg Monthly Outflow"] == 1500.0
+
+
+def test_average_balance_only_uses_printed_balances():
+    appfin.add_transactions("u", [
+        {"Date": "01/01/2024", "Description": "RENT", "Amount": -1000.0, "Balance": None},
+        {"Date": "02/01/2024", "Description": "SALARY", "Amount": 50000.0, "Balance": None},
+    ])
+    assert appfin.get_customer_features("u")["Average Balance"] is None
+
+
+def test_salary_needs_keyword_amount_and_months():
+    interest = [{"Date": f"01/0{m}/2024", "Description": "INTEREST", "Amount": 10.0, "Balance": None} for m in (1, 2, 3)]
+    appfin.add_transactions("u", interest)
+    assert not appfin.get_customer_features("u")["Salary Detected"]
+
+    appfin.add_transactions("u", [{"Date": "01/01/2024", "Description": "ACME SALARY", "Amount": 50000.0, "Balance": None}])
+    assert not appfin.get_customer_features("u")["Salary Detected"]
+
+    appfin.add_transactions("u", [
+        {"Date": f"01/0{m}/2024", "Description": "ACME SALARY", "Amount": 50000.0, "Balance": None} for m in (2, 3)
+    ])
+    assert appfin.get_customer_features("u")["Salary Detected"]
@@ -0,0 +1,48 @@
+import appfin
+
+
+HDFC_STATEMENT = "\n".join([
+    "HDFC BANK Statement of Account",
+    "Date Narration Chq/Ref No Value Dt Withdrawal Amt Deposit Amt Closing Balance",
+    "Opening Balance 15,000.00",
+    "01/02/2024 ATM-WDL/MG ROAD 5000.00 10000.00",
+    "02/02/2024 NEFT-ACME CORP SALARY - 45,000.00 55,000.00",
+    "03/02/2024 UPI/SWIGGY 250.00 - 54,750.00",
+])
+
+
+def test_classifies_hdfc_layout_and_routes_to_column_parser():
+    doc_type, template, _ = appfin.classify_document(HDFC_STATEMENT)
+    assert (doc_type, template) == ("Bank Statements", "HDFC Bank")
+    assert appfin.get_statement_parser(template) is appfin.parse_column_statement
+
+
+def test_unknown_layout_is_not_classified():
+    doc_type, template, _ = appfin.classify_document("lorem ipsum dolor sit amet")
+    assert doc_type is None and template is None
+
+
+def test_column_statement_signs_withdrawals_and_deposits():
+    transactions, skipped = appfin.parse_column_statement(HDFC_STATEMENT)
+    assert skipped == 0
+    assert [t["Description"] for t in transactions] == ["ATM-WDL/MG ROAD", "NEFT-ACME CORP SALARY", "UPI/SWIGGY"]
+    assert [t["Amount"] for t in transactions] == [-5000.0, 45000.0, -250.0]
+    assert [t["Balance"] for t in transactions] == [10000.0, 55000.0, 54750.0]
+
+
+def test_generic_template_uses_marker_parser():
+    assert appfin.get_statement_parser("Generic Bank") is appfin.parse_bank_transactions
+    assert appfin.get_statement_parser(None) is appfin.parse_bank_transactions
+
+
+def test_long_statement_is_classified_from_its_header():
+    body = "\n".join(f"{day % 28 + 1:02d}/02/2024 UPI/{day}/MERCHANT{day} 250.00 - 15,000.00" for day in range(2000))
+    long_statement = HDFC_STATEMENT + "\n" + body
+    assert appfin.classify_document(long_statement) == appfin.classify_document(HDFC_STATEMENT)
+    assert appfin.classify_document(long_statement)[:2] == ("Bank Statements", "HDFC Bank")
+
+
+def test_header_is_bounded():
+    header = appfin.document_header("\n\n".join(["x" * 500] * 100))
+    assert len(header) <= appfin.LAYOUT_HEADER_CHARS
+    assert "\n\n" not in appfin.document_header("a\n\n  \nb")
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import appfin
+
+DATASET = Path(__file__).resolve().parent.parent / "data" / "dataset.csv"
+
+
+def test_emi_matches_closed_form():
+    emi, total_interest = appfin.compute_emi(100000, 12.0, 12, 0)
+    assert float(emi) == pytest.approx(8884.88, abs=0.01)
+    assert float(total_interest) == pytest.approx(8884.88 * 12 - 100000, abs=0.1)
+
+
+def test_zero_rate_emi():
+    emi, total_interest = appfin.compute_emi(120000, 0.0, 12, 6)
+    assert float(emi) == pytest.approx(10000.0)
+    assert float(total_interest) == pytest.approx(0.0)
+
+
+def test_moratorium_capitalises_interest():
+    emi_without, _ = appfin.compute_emi(100000, 12.0, 12, 0)
+    emi_with, _ = appfin.compute_emi(100000, 12.0, 12, 6)
+    assert float(emi_with) == pytest.approx(float(emi_without) * 1.01 ** 6)
+
+
+@pytest.mark.parametrize("rate, tenure, moratorium", [(9.5, 60, 0), (9.5, 60, 12), (0.0, 12, 6)])
+def test_schedule_ends_at_zero_balance(rate, tenure, moratorium):
+    schedule = appfin.amortization_schedule(500000, rate, tenure, moratorium)
+    assert len(schedule) == tenure + moratorium
+    assert (schedule["Payment (₹)"].iloc[:moratorium] == 0).all()
+    assert schedule["Balance (₹)"].iloc[-1] == pytest.approx(0.0, abs=0.01)
+    outstanding = 500000 * (1 + rate / 1200) ** moratorium
+    assert schedule["Principal (₹)"].sum() == pytest.approx(outstanding, abs=0.01)
+
+
+def test_scenario_grid_covers_every_combination():
+    grid = appfin.emi_scenario_grid(500000, 9.0)
+    assert len(grid) == len(appfin.RATE_SHIFTS) * len(appfin.TENURE_OPTIONS) * len(appfin.MORATORIUM_OPTIONS)
+    assert not grid.duplicated(["Interest Rate (%)", "Tenure (months)", "Moratorium (months)"]).any()
+
+
+def test_vectorised_rate_lookup_matches_index():
+    df = pd.read_csv(DATASET)
+    loan = df[["Tuition Fee", "Exam Fee", "Hostel Fee", "Travel Fee"]].fillna(0).sum(axis=1).to_numpy()
+    index = appfin.build_offer_index(appfin.BANK_RATES)
+    rates = appfin.lookup_best_rates(index, df["Credit Score"].to_numpy(), df["Caste"], loan)
+    for credit_score, caste, amount, rate in zip(df["Credit Score"], df["Caste"], loan, rates):
+        offers = appfin.find_eligible_banks(index, credit_score, caste, amount)
+        if offers:
+            assert rate == offers[0]["Interest Rate (%)"]
+        else:
+            assert np.isnan(rate)
+
+
+def test_batch_covers_every_row():
+    batch, no_offer = appfin.batch_emi_scenarios(DATASET)
+    rows = len(pd.read_csv(DATASET))
+    grid_size = len(appfin.RATE_SHIFTS) * len(appfin.TENURE_OPTIONS) * len(appfin.MORATORIUM_OPTIONS)
+    assert batch.shape == ((rows - no_offer) * grid_size, 7)
+    assert 0 < no_offer < rows
+    assert batch["EMI (₹)"].notna().all()
@@ -0,0 +1,41 @@
+import itertools
+
+import pytest
+
+import appfin
+
+
+def linear_scan(credit_score, caste, total_loan):
+    offers = []
+    for bank in appfin.BANK_RATES:
+        if credit_score >= bank["Min Credit Score"] and total_loan <= bank["Max Loan Amount"]:
+            rate = max(bank["Base Rate"] - appfin.CASTE_RATE_DISCOUNT.get(caste, 0.0), appfin.MIN_INTEREST_RATE)
+            offers.append((bank["Bank Name"], rate))
+    return sorted(offers, key=lambda offer: offer[1])
+
+
+def boundaries(values):
+    return sorted({edge + delta for edge in values for delta in (-1, 0, 1)} | {0})
+
+
+def test_index_matches_linear_scan_across_boundaries():
+    index = appfin.build_offer_index(appfin.BANK_RATES)
+    scores = boundaries(bank["Min Credit Score"] for bank in appfin.BANK_RATES)
+    amounts = boundaries(bank["Max Loan Amount"] for bank in appfin.BANK_RATES)
+    for credit_score, caste, total_loan in itertools.product(scores, appfin.CASTE_CATEGORIES, amounts):
+        found = appfin.find_eligible_banks(index, credit_score, caste, total_loan)
+        assert [(offer["Bank Name"], offer["Interest Rate (%)"]) for offer in found] == linear_scan(credit_score, caste, total_loan)
+
+
+def test_rates_stay_numeric_and_sorted():
+    index = appfin.build_offer_index(appfin.BANK_RATES)
+    rates = [offer["Interest Rate (%)"] for offer in appfin.find_eligible_banks(index, 900, "SC", 100000)]
+    assert all(isinstance(rate, float) for rate in rates)
+    assert rates == sorted(rates)
+    assert min(rates) >= appfin.MIN_INTEREST_RATE
+
+
+def test_unknown_caste_is_an_error():
+    index = appfin.build_offer_index(appfin.BANK_RATES)
+    with pytest.raises(KeyError):
+        appfin.find_eligible_banks(index, 900, "Unknown", 100000)
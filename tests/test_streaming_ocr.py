@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+import streamlit as st
+from PIL import Image, ImageDraw
+
+import appfin
+
+
+@pytest.fixture
+def page():
+    img = Image.new("RGB", (400, 800), "white")
+    draw = ImageDraw.Draw(img)
+    for top in range(10, 800, 40):
+        draw.rectangle((10, top, 390, top + 20), fill="black")
+    return img
+
+
+@pytest.fixture(autouse=True)
+def no_job():
+    st.session_state['ocr_job'] = None
+    st.session_state['ocr_job_shown'] = False
+
+
+def test_blocks_are_cut_on_blank_rows(page):
+    blocks = appfin.split_into_blocks(page)
+    assert len(blocks) == appfin.BLOCKS_PER_PAGE
+    assert sum(block.height for block in blocks) == page.height
+    for block in blocks[1:]:
+        assert block.crop((0, 0, block.width, 1)).convert("L").getextrema()[0] == 255
+
+
+def test_block_read_after_cancel_is_dropped(page, monkeypatch):
+    reading = threading.Event()
+
+    def slow_ocr(block):
+        reading.set()
+        time.sleep(0.2)
+        return "text"
+
+    monkeypatch.setattr(appfin.pytesseract, "image_to_string", slow_ocr)
+    job = appfin.start_ocr_job("file", page)
+    reading.wait(1)
+    job["cancel"].set()
+    while not job["done"]:
+        time.sleep(0.01)
+    assert job["blocks"] == []
+
+
+def test_unshown_job_is_stopped(page, monkeypatch):
+    monkeypatch.setattr(appfin.pytesseract, "image_to_string", lambda block: time.sleep(0.05) or "text")
+    job = appfin.start_ocr_job("file", page)
+    appfin.stop_unshown_ocr_job()
+    assert job["cancel"].is_set()
+    assert st.session_state['ocr_job'] is None